@@ -3,6 +3,7 @@ Central configuration for the VAPI → Supabase ETL pipeline.
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 from supabase import create_client, Client
@@ -17,24 +18,41 @@ VAPI_API_KEY = os.getenv("VAPI_API_KEY")
 VAPI_BASE_URL = "https://api.vapi.ai/v2/call"
 CALLS_ENDPOINT = f"{VAPI_BASE_URL}/call"
 VAPI_PAGE_LIMIT = 1000
+EXTRACT_MAX_WORKERS = 8
+VAPI_REQUESTS_PER_SECOND = 10  # token-bucket rate for page requests
 
 # ───────────────────────────────────────────────
 # SUPABASE CONFIGS
 # ───────────────────────────────────────────────
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+# Transaction-pooler connection string (Supavisor, port 6543); enables load_fast.py
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
+# Project JWT secret; when set, Storage signed URLs are minted locally (no API call per batch)
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
 BUCKET_NAME = "ai-call-recordings"
 
 SUPABASE_SCHEMA = "public"
 LOAD_BATCH_SIZE = 1000
+EXISTING_CHECK_BATCH_SIZE = 100  # ids per existence query (keeps the in.(...) URL short)
+EXISTING_CHECK_MAX_WORKERS = 8
 
 # ───────────────────────────────────────────────
 # UPLOAD SETTINGS
 # ───────────────────────────────────────────────
 MAX_RETRIES = 5
 BACKOFF_BASE = 3
+MAX_BACKOFF = 60  # cap (seconds) for a single retry wait (uploads and Retry-After)
 MAX_WORKERS = 4
 SIGNED_URL_EXPIRY_HOURS = 24 * 7  # 7 days
+# Cached signed URLs are reused only within this many hours of being minted, so rows
+# always land with at least SIGNED_URL_EXPIRY_HOURS - SIGNED_URL_CACHE_MARGIN_HOURS of life left
+SIGNED_URL_CACHE_MARGIN_HOURS = 1
+
+# ───────────────────────────────────────────────
+# PIPELINE SETTINGS
+# ───────────────────────────────────────────────
+PIPELINE_QUEUE_SIZE = 4  # extracted pages buffered ahead of transform/upload
 
 # ───────────────────────────────────────────────
 # LOGGING AND CHECKPOINTS
@@ -42,10 +60,18 @@ SIGNED_URL_EXPIRY_HOURS = 24 * 7  # 7 days
 LOG_FILE = "logs/upload_log.txt"
 USE_RICH_LOGGING = True
 FAILED_UPLOADS_CSV = "failed_uploads.csv"
+EXTRACT_CACHE_DIR = ".extract_cache"
+EXTRACT_CACHE_MAX_AGE_HOURS = 24 * 7  # cached page bodies older than this are deleted
+INTERMEDIATE_PARQUET = "calls_with_recordings.parquet"
+INTERMEDIATE_CSV = "calls_with_recordings.csv"
+SIGNED_URL_CACHE_PARQUET = "signed_url_cache.parquet"  # call_id → signed URL kept across runs
+RECORDING_ETAG_CACHE_PARQUET = "recording_etag_cache.parquet"  # call_id → source ETag last uploaded
+RECORDING_ETAG_CACHE_MAX_AGE_DAYS = 30  # ETags of recordings uploaded longer ago than this are forgotten
 
 # ───────────────────────────────────────────────
 # SUPABASE CLIENT INITIALIZATION
 # ───────────────────────────────────────────────
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
-    """Return a new Supabase client instance."""
-    return create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)        
+    """Return the shared Supabase client instance (created on first call)."""
+    return create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
@@ -7,6 +7,8 @@ Fetches call records from the VAPI v2 API with optional incremental filtering.
 
 Simplified version — minimal helpers, clear flow:
 - Pagination and API error handling included.
+- Pages after the first are fetched concurrently over one HTTP/2 connection.
+- Conditional GETs (ETag / Last-Modified) reuse cached pages when a closed window is re-run.
 - Built-in incremental filtering with updatedAtGt / updatedAtLt.
 - Stops automatically when final page reached.
 - Safe guards for overly large result sets.
@@ -15,22 +17,180 @@ Author: Ronak (refactored for clarity and simplicity)
 """
 
 from __future__ import annotations
+import concurrent.futures
+import hashlib
+import math
+import os
+import threading
 import time
-import requests
-from typing import Any, Dict, List, Optional
+import httpx
+import orjson
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from config import (
     VAPI_BASE_URL,
     VAPI_API_KEY,
     VAPI_PAGE_LIMIT,
+    EXTRACT_MAX_WORKERS,
+    EXTRACT_CACHE_DIR,
+    EXTRACT_CACHE_MAX_AGE_HOURS,
+    MAX_BACKOFF,
+    VAPI_REQUESTS_PER_SECOND,
     USE_RICH_LOGGING,
 )
 from utils.logger_utils import get_logger
+from utils.rate_limiter import TokenBucket
 
 __all__ = ["extract_calls"]
 
 logger = get_logger(__name__, use_rich=USE_RICH_LOGGING)
 
+# Keeps concurrent page fetches just under VAPI's request ceiling
+_RATE_LIMITER = TokenBucket(rate=VAPI_REQUESTS_PER_SECOND)
+
+# Built once at import; read-only so concurrent page fetches can't mutate it
+_HEADERS = MappingProxyType({
+    "Authorization": f"Bearer {VAPI_API_KEY}",
+    "Content-Type": "application/json",
+})
+
+# Shared HTTP/2 client: concurrent page requests are multiplexed as streams over
+# one TLS connection (the pool only grows if the server falls back to HTTP/1.1)
+_CLIENT = httpx.Client(
+    headers=dict(_HEADERS),
+    timeout=30,
+    transport=httpx.HTTPTransport(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=EXTRACT_MAX_WORKERS,
+            max_keepalive_connections=EXTRACT_MAX_WORKERS,
+        ),
+        retries=3,  # connect-level retries
+    ),
+)
+
+# Status-level retries (httpx only retries failed connects)
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_ATTEMPTS = 5
+_BACKOFF_FACTOR = 0.5
+
+
+def _retry_after_seconds(resp: httpx.Response) -> Optional[float]:
+    """
+    Parse a numeric Retry-After header, capped at MAX_BACKOFF.
+    Missing, non-numeric, negative or non-finite values count as no header.
+    """
+    try:
+        seconds = float(resp.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+    if not math.isfinite(seconds) or seconds < 0:
+        return None
+    return min(seconds, MAX_BACKOFF)
+
+
+def _get_with_retry(params: Dict[str, Any], headers: Dict[str, str]) -> httpx.Response:
+    """GET a page, retrying 429/5xx with exponential backoff (honoring Retry-After)."""
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        _RATE_LIMITER.acquire()
+        resp = _CLIENT.get(VAPI_BASE_URL, params=params, headers=headers)
+        if resp.status_code not in _RETRY_STATUSES or attempt == _MAX_ATTEMPTS:
+            return resp
+        wait = _retry_after_seconds(resp)
+        if wait is None:  # Retry-After: 0 is a valid "retry now"
+            wait = _BACKOFF_FACTOR * 2 ** (attempt - 1)
+        logger.warning(f"[RETRY] HTTP {resp.status_code} — attempt {attempt}/{_MAX_ATTEMPTS}, retrying in {wait:.1f}s...")
+        time.sleep(wait)
+    return resp
+
+
+# ============================================================================
+# 🧩 Helper: Conditional-GET page cache (ETag / Last-Modified)
+# ============================================================================
+
+_CACHE_INDEX_PATH = os.path.join(EXTRACT_CACHE_DIR, "extract_cache.json")
+_cache_lock = threading.Lock()
+_cache_index: Optional[Dict[str, Dict[str, Optional[str]]]] = None
+
+
+def _is_cacheable_window(updated_at_lt: Optional[str]) -> bool:
+    """
+    Only closed windows (updatedAtLt given) are cached: open-ended incremental runs
+    move updatedAtGt every time, so their keys never repeat and would only fill the disk.
+    """
+    return updated_at_lt is not None
+
+
+def _prune_cache_index(index: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Delete page bodies older than EXTRACT_CACHE_MAX_AGE_HOURS (or from before ages were recorded)."""
+    cutoff = time.time() - EXTRACT_CACHE_MAX_AGE_HOURS * 3600
+    kept = {}
+    for key, entry in index.items():
+        if entry.get("stored_at", 0) >= cutoff:
+            kept[key] = entry
+            continue
+        try:
+            os.remove(entry["body_path"])
+        except OSError:
+            pass
+    if len(kept) != len(index):
+        logger.info(f"🧹 Pruned {len(index) - len(kept)} expired page(s) from the extract cache.")
+    return kept
+
+
+def _page_cache_key(page: int, updated_at_gt: Optional[str], updated_at_lt: Optional[str]) -> str:
+    return hashlib.sha1(f"{page}|{updated_at_gt}|{updated_at_lt}".encode()).hexdigest()
+
+
+def _load_cache_index() -> Dict[str, Dict[str, Any]]:
+    """Return the shared cache index, reading and pruning it on first use."""
+    global _cache_index
+    with _cache_lock:
+        if _cache_index is None:
+            try:
+                with open(_CACHE_INDEX_PATH, "rb") as f:
+                    index = orjson.loads(f.read())
+            except (OSError, orjson.JSONDecodeError):
+                index = {}
+            _cache_index = _prune_cache_index(index)
+            if len(_cache_index) != len(index):
+                with open(_CACHE_INDEX_PATH, "wb") as f:
+                    f.write(orjson.dumps(_cache_index))
+        return _cache_index
+
+
+def _get_cached_page(key: str) -> Optional[Dict[str, Optional[str]]]:
+    """Return the cache entry for a page if its body is still on disk."""
+    index = _load_cache_index()
+    with _cache_lock:
+        entry = index.get(key)
+    if entry and os.path.exists(entry["body_path"]):
+        return entry
+    return None
+
+
+def _store_cached_page(key: str, resp: httpx.Response) -> None:
+    """Persist a page body plus its validators so the next run can send a conditional GET."""
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return
+
+    body_path = os.path.join(EXTRACT_CACHE_DIR, f"{key}.json")
+    with _cache_lock:
+        os.makedirs(EXTRACT_CACHE_DIR, exist_ok=True)
+        with open(body_path, "wb") as f:
+            f.write(resp.content)
+        _cache_index[key] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_path": body_path,
+            "stored_at": time.time(),
+        }
+        with open(_CACHE_INDEX_PATH, "wb") as f:
+            f.write(orjson.dumps(_cache_index))
+
 
 # ============================================================================
 # 🧩 Helper: Fetch one page
@@ -45,11 +205,6 @@ def _fetch_page(
     Fetch a single page of results from the VAPI API.
     Returns both data and status info.
     """
-    headers = {
-        "Authorization": f"Bearer {VAPI_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
     params: Dict[str, Any] = {
         "page": page,
         "limit": VAPI_PAGE_LIMIT,
@@ -60,17 +215,35 @@ def _fetch_page(
     if updated_at_lt:
         params["updatedAtLt"] = updated_at_lt
 
+    # Send validators from the previous run; a 304 lets us reuse the cached body
+    use_cache = _is_cacheable_window(updated_at_lt)
+    cache_key = _page_cache_key(page, updated_at_gt, updated_at_lt)
+    cached = _get_cached_page(cache_key) if use_cache else None
+    headers: Dict[str, str] = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
     try:
-        resp = requests.get(VAPI_BASE_URL, headers=headers, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
+        resp = _get_with_retry(params, headers)
+        if resp.status_code == 304 and cached:
+            logger.debug(f"[Page {page}] Not modified — using cached body.")
+            with open(cached["body_path"], "rb") as f:
+                body = f.read()
+        else:
+            resp.raise_for_status()
+            body = resp.content
+            if use_cache:
+                _store_cached_page(cache_key, resp)
+        data = orjson.loads(body)
         return {
             "success": True,
             "calls": data.get("results", []),
             "metadata": data.get("metadata", {}),
             "message": "OK",
         }
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"HTTP error on page {page}: {e}")
         return {"success": False, "calls": [], "metadata": {}, "message": str(e)}
     except Exception as e:
@@ -78,6 +251,78 @@ def _fetch_page(
         return {"success": False, "calls": [], "metadata": {}, "message": str(e)}
 
 
+# ============================================================================
+# 🧩 Helper: Iterate pages in order (remaining pages fetched concurrently)
+# ============================================================================
+
+def _iter_pages_concurrently(
+    pages: range,
+    updated_at_gt: Optional[str],
+    updated_at_lt: Optional[str],
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Fetch the given page numbers in parallel, yielding (page, result) in page order.
+    Each result is released as soon as it has been yielded.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=EXTRACT_MAX_WORKERS) as executor:
+        futures = {
+            page: executor.submit(_fetch_page, page, updated_at_gt, updated_at_lt)
+            for page in pages
+        }
+        try:
+            for page in pages:
+                yield page, futures.pop(page).result()
+        finally:
+            # Consumer stopped early → don't start pages nobody will read
+            for future in futures.values():
+                future.cancel()
+
+
+def _has_next_page(result: Dict[str, Any]) -> bool:
+    """
+    Decide whether another page follows, preferring explicit metadata
+    (hasNextPage / nextPage) over the "full page" length heuristic.
+    """
+    metadata = result["metadata"]
+    if "hasNextPage" in metadata:
+        return bool(metadata["hasNextPage"])
+    if "nextPage" in metadata:
+        return metadata["nextPage"] is not None
+    return len(result["calls"]) >= VAPI_PAGE_LIMIT
+
+
+def _iter_pages(
+    first: Dict[str, Any],
+    updated_at_gt: Optional[str],
+    updated_at_lt: Optional[str],
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield (page, result) in page order, starting with the already-fetched page 1.
+    Uses totalPages / totalItems to fetch the rest concurrently, else pages sequentially.
+    """
+    yield 1, first
+    if not first["success"]:
+        return
+
+    metadata = first["metadata"]
+    num_pages = metadata.get("totalPages")
+    if num_pages is None and metadata.get("totalItems") is not None:
+        num_pages = max(1, math.ceil(metadata["totalItems"] / VAPI_PAGE_LIMIT))
+
+    if num_pages is not None:
+        if num_pages > 1:
+            logger.info(f"Fetching pages 2..{num_pages} concurrently...")
+            yield from _iter_pages_concurrently(range(2, num_pages + 1), updated_at_gt, updated_at_lt)
+        return
+
+    # --- No page counts in metadata → fall back to sequential paging
+    page, result = 1, first
+    while result["success"] and _has_next_page(result):
+        page += 1
+        result = _fetch_page(page, updated_at_gt, updated_at_lt)
+        yield page, result
+
+
 # ============================================================================
 # 🚀 Main Extraction Function
 # ============================================================================
@@ -85,13 +330,19 @@ def _fetch_page(
 def extract_calls(
     updated_at_gt: Optional[str] = None,
     updated_at_lt: Optional[str] = None,
+    sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
 ) -> Dict[str, Any]:
     """
     Fetch call records from VAPI v2 with pagination and optional filters.
 
+    Page 1 is fetched first to read ``totalItems``; the remaining pages are
+    then fetched concurrently and handed on in page order.
+
     Args:
         updated_at_gt: Extract calls updated after this UTC timestamp.
         updated_at_lt: Extract calls updated before this UTC timestamp.
+        sink: Optional callable receiving each page of calls. When given,
+            calls are not accumulated and "calls" in the result is empty.
 
     Returns:
         dict: {
@@ -104,58 +355,55 @@ def extract_calls(
         }
     """
     logger.info("🔹 Starting extraction from VAPI API...")
-    page = 1
     all_calls: List[Dict[str, Any]] = []
-    metadata: Dict[str, Any] = {}
+    num_calls = 0
 
-    while True:
-        result = _fetch_page(page, updated_at_gt, updated_at_lt)
+    # Prune expired page bodies every run, even when this window is not cached
+    _load_cache_index()
+
+    first = _fetch_page(1, updated_at_gt, updated_at_lt)
+    metadata: Dict[str, Any] = first.get("metadata", {})
+
+    # --- Guard: too many totalItems (prevent runaway extraction)
+    total_items = metadata.get("totalItems")
+    if total_items and total_items > 10000:
+        msg = f"Returned {total_items} calls (>10k). Please narrow the date range."
+        logger.error(msg)
+        return {
+            "success": False,
+            "message": msg,
+            "metadata": metadata,
+            "calls": [],
+            "num_calls": 0,
+            "num_pages": 1,
+        }
+
+    page = 0
+    for page, result in _iter_pages(first, updated_at_gt, updated_at_lt):
         if not result["success"]:
             logger.error(f"❌ Extraction failed on page {page}: {result['message']}")
             break
 
         calls = result.get("calls", [])
-        metadata = result.get("metadata", {})
-
-        # --- Guard: too many totalItems (prevent runaway extraction)
-        if page == 1:
-            total_items = metadata.get("totalItems")
-            if total_items and total_items > 10000:
-                msg = f"Returned {total_items} calls (>10k). Please narrow the date range."
-                logger.error(msg)
-                return {
-                    "success": False,
-                    "message": msg,
-                    "metadata": metadata,
-                    "calls": [],
-                    "num_calls": 0,
-                    "num_pages": page,
-                }
-
-        # --- No data? Stop pagination
         if not calls:
             logger.info(f"No more records after page {page}. Extraction complete.")
             break
 
-        # --- Append results and log progress
-        all_calls.extend(calls)
+        # --- Hand off or append results and log progress
+        if sink is not None:
+            sink(calls)
+        else:
+            all_calls.extend(calls)
+        num_calls += len(calls)
         logger.info(f"[Page {page}] Retrieved {len(calls)} calls.")
 
-        # --- If last page smaller than limit → stop
-        if len(calls) < VAPI_PAGE_LIMIT:
-            logger.info("Reached final page (less than limit).")
-            break
-
-        page += 1
-        time.sleep(0.3)  # polite delay between requests
-
-    logger.success(f"✅ Extraction complete — total {len(all_calls)} calls fetched.")
+    logger.success(f"✅ Extraction complete — total {num_calls} calls fetched.")
     return {
         "success": True,
-        "message": f"Extracted {len(all_calls)} calls successfully.",
+        "message": f"Extracted {num_calls} calls successfully.",
         "calls": all_calls,
         "metadata": metadata,
-        "num_calls": len(all_calls),
+        "num_calls": num_calls,
         "num_pages": page,
     }
 
@@ -3,16 +3,30 @@ load.py — Loads transformed call data into Supabase (schema: super_aia)
 Performs schema validation, NaN cleaning, logging, and upsert with audit tracking.
 """
 
+import ast
+import concurrent.futures
+import functools
+import threading
+import orjson
 import pandas as pd
 import numpy as np
-from config import get_supabase_client, SUPABASE_SCHEMA, USE_RICH_LOGGING
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    SUPABASE_URL,
+    SUPABASE_SERVICE_KEY,
+    SUPABASE_SCHEMA,
+    LOAD_BATCH_SIZE,
+    MAX_WORKERS,
+    USE_RICH_LOGGING,
+)
 from utils.logger_utils import get_logger
 from datetime import datetime, timezone
+from typing import Callable, Tuple
 
 __all__ = ["load_to_supabase"]
 
 logger = get_logger(__name__, use_rich=USE_RICH_LOGGING)
-supabase = get_supabase_client()
 
 EXPECTED_SCHEMA = {
     "id": "object",
@@ -43,13 +57,41 @@ EXPECTED_SCHEMA = {
 }
 
 REQUIRED_COLUMNS = ["id", "jsonb"]
+REQUIRED_COLUMN_SET = frozenset(REQUIRED_COLUMNS)
+# transform serializes these to JSON text; they are sent as-is instead of re-encoded
+JSON_COLUMNS = ["customer_json", "assistant_number_json", "analysis_json", "jsonb"]
+JSON_COLUMN_SET = frozenset(JSON_COLUMNS)
 TABLE_NAME = "ai_calls"
 
+# Upserts go straight to PostgREST: one orjson encode per batch, keep-alive connections
+UPSERT_URL = f"{SUPABASE_URL}/rest/v1/{TABLE_NAME}?on_conflict=id"
+_UPSERT_HEADERS = {
+    "apikey": SUPABASE_SERVICE_KEY,
+    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+    "Content-Type": "application/json",
+    "Content-Profile": SUPABASE_SCHEMA,
+    "Prefer": "resolution=merge-duplicates,return=minimal",
+}
+
+# requests.Session is not guaranteed thread-safe: one per upsert worker thread
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """Return this thread's HTTP session, creating it on first use."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        session.headers.update(_UPSERT_HEADERS)
+        _thread_local.session = session
+    return session
+
 
 def _validate_dataframe_schema(df: pd.DataFrame):
     logger.info("🔍 Validating DataFrame schema before load...")
 
-    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    missing_cols = sorted(REQUIRED_COLUMN_SET - set(df.columns))
     if missing_cols:
         logger.error(f"❌ Missing required columns: {missing_cols}")
         return False
@@ -61,26 +103,109 @@ def _validate_dataframe_schema(df: pd.DataFrame):
 def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Cleans DataFrame for JSON serialization:
-    - replaces NaN / inf with None
+    - converts Arrow-backed columns back to plain Python objects
+    - replaces NaN / NA / inf with None
     - ensures object columns are serializable
     """
     logger.info("🧹 Cleaning DataFrame for JSON serialization...")
 
-    # Replace NaN and inf with None
-    df = df.replace([np.nan, np.inf, -np.inf], None)
+    # Shallow copy: columns are replaced below, so the caller's frame is left untouched
+    df = df.copy(deep=False)
 
-    # Optional: ensure all JSON fields are valid JSON strings
-    json_columns = ["customer_json", "assistant_number_json", "analysis_json", "jsonb"]
-    for col in json_columns:
-        if col in df.columns:
-            df[col] = df[col].apply(
-                lambda x: None if pd.isna(x) or x in ["nan", "NaN", "None"] else x
-            )
+    # Cast to object either way: Arrow-backed columns would otherwise hand pd.NA to the encoder
+    num_cols = df.select_dtypes(include="number").columns
+    other_cols = df.columns.difference(num_cols, sort=False)
+
+    # Numeric columns: NaN / NA / ±inf → None (only these can hold inf)
+    if len(num_cols):
+        finite = np.isfinite(df[num_cols].astype("float64"))
+        df[num_cols] = df[num_cols].astype(object).where(finite, None)
+
+    # Everything else: NaN / NA → None
+    if len(other_cols):
+        other_df = df[other_cols].astype(object)
+        df[other_cols] = other_df.where(other_df.notna(), None)
+
+    # Null out missing / stringified-null JSON fields in one vectorized pass
+    json_columns = [col for col in JSON_COLUMNS if col in df.columns]
+    if json_columns:
+        json_df = df[json_columns]
+        sentinel_mask = json_df.isna() | json_df.isin(["nan", "NaN", "None"])
+        df[json_columns] = json_df.mask(sentinel_mask, None)
 
     logger.success("✅ Data cleaned successfully — ready for load.")
     return df
 
 
+@functools.lru_cache(maxsize=8)
+def _compile_row_converter(columns: Tuple[str, ...]) -> Callable[[tuple, int], dict]:
+    """
+    Generate a function that builds one record dict from per-column arrays,
+    with the column names baked in as literal keys. Replaces to_dict(orient="records"),
+    which re-inspects dtypes for every row.
+    """
+    fields = ", ".join(f"{col!r}: a[{idx}][i]" for idx, col in enumerate(columns))
+    namespace: dict = {}
+    exec(f"def _row_to_dict(a, i):\n    return {{{fields}}}\n", namespace)
+    return namespace["_row_to_dict"]
+
+
+def _as_json_fragments(values: np.ndarray) -> np.ndarray:
+    """Wrap pre-serialized JSON text so orjson embeds it verbatim rather than as a string."""
+    return np.array([None if v is None else orjson.Fragment(v) for v in values], dtype=object)
+
+
+def _reencode_json_text(value):
+    """
+    Normalize one JSON cell read back from CSV to compact JSON text.
+    Accepts JSON or the Python repr of a dict/list (older CSV exports); returns None if neither parses.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        return orjson.dumps(orjson.loads(value)).decode()
+    except orjson.JSONDecodeError:
+        pass
+    try:
+        return orjson.dumps(ast.literal_eval(value)).decode()
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return None
+
+
+def _reencode_json_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validate and re-encode the JSON columns of a CSV-loaded frame before they are sent
+    as raw fragments; unparseable cells become NULL instead of corrupting a whole batch.
+    """
+    for col in JSON_COLUMNS:
+        if col not in df.columns:
+            continue
+        raw = df[col]
+        encoded = raw.map(_reencode_json_text)
+        bad = int((raw.notna() & encoded.isna()).sum())
+        if bad:
+            logger.warning(f"⚠️ {col}: {bad} cell(s) are not valid JSON — loading them as NULL.")
+        df[col] = encoded
+    return df
+
+
+def _upsert_one_batch(batch: list, batch_number: int) -> int:
+    """
+    Upsert a single batch of records straight to PostgREST and return how many rows were written.
+    The body is encoded once with orjson; errors are logged and counted as a fully failed batch.
+    """
+    try:
+        body = orjson.dumps(batch, option=orjson.OPT_SERIALIZE_NUMPY)
+        resp = _get_session().post(UPSERT_URL, data=body, timeout=60)
+        resp.raise_for_status()
+    except Exception as e:
+        logger.error(f"❌ Batch {batch_number}: upsert failed — {e}")
+        return 0
+
+    logger.success(f"✅ Batch {batch_number}: {len(batch)} upserted.")
+    return len(batch)
+
+
 def load_to_supabase(df: pd.DataFrame):
     if df.empty:
         logger.warning("⚠️ No records to load — DataFrame is empty.")
@@ -92,31 +217,43 @@ def load_to_supabase(df: pd.DataFrame):
     # Clean NaN/inf/nulls
     df = _clean_dataframe(df)
 
-    # Add audit timestamp
+    # Sent per row: a merge-duplicates upsert would otherwise leave updated rows with a stale audit time
     audit_time = datetime.now(timezone.utc).isoformat()
     df["audit_timestamp"] = audit_time
 
-    records = df.to_dict(orient="records")
-    total_records = len(records)
-    BATCH_SIZE = 1000
+    total_records = len(df)
 
     logger.info(f"🚀 Starting upsert of {total_records} records into '{TABLE_NAME}'...")
 
     success_count = 0
+    # Cap in-flight batches so the whole dataset is never queued as dicts at once
+    slots = threading.BoundedSemaphore(MAX_WORKERS * 2)
+
+    def _upsert_and_release(batch, batch_number):
+        try:
+            return _upsert_one_batch(batch, batch_number)
+        finally:
+            slots.release()
+
     try:
-        for i in range(0, total_records, BATCH_SIZE):
-            batch = records[i : i + BATCH_SIZE]
-            batch_number = i // BATCH_SIZE + 1
-            logger.info(f"🔹 Batch {batch_number} ({len(batch)} rows)...")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = []
+            row_to_dict = _compile_row_converter(tuple(df.columns))
+            arrays = tuple(
+                _as_json_fragments(df[col].to_numpy()) if col in JSON_COLUMN_SET else df[col].to_numpy()
+                for col in df.columns
+            )
 
-            resp = supabase.table(TABLE_NAME).upsert(batch, on_conflict="id").execute()
+            # Convert one batch at a time so only in-flight batches hold dicts
+            for i in range(0, total_records, LOAD_BATCH_SIZE):
+                slots.acquire()
+                batch = [row_to_dict(arrays, j) for j in range(i, min(i + LOAD_BATCH_SIZE, total_records))]
+                batch_number = i // LOAD_BATCH_SIZE + 1
+                logger.info(f"🔹 Batch {batch_number} ({len(batch)} rows)...")
+                futures.append(executor.submit(_upsert_and_release, batch, batch_number))
 
-            if hasattr(resp, "data") and resp.data:
-                batch_success = len(resp.data)
-                success_count += batch_success
-                logger.success(f"✅ Batch {batch_number}: {batch_success} upserted.")
-            else:
-                logger.warning(f"⚠️ Batch {batch_number}: no response data from Supabase.")
+            for future in concurrent.futures.as_completed(futures):
+                success_count += future.result()
 
         fail_count = total_records - success_count
         if fail_count == 0:
@@ -133,12 +270,18 @@ def load_to_supabase(df: pd.DataFrame):
 
 if __name__ == "__main__":
     import sys, os
+    from config import INTERMEDIATE_PARQUET
 
-    path = sys.argv[1] if len(sys.argv) > 1 else "calls_with_recordings.csv"
+    path = sys.argv[1] if len(sys.argv) > 1 else INTERMEDIATE_PARQUET
     if not os.path.exists(path):
-        logger.error(f"❌ CSV not found at: {path}")
+        logger.error(f"❌ File not found at: {path}")
         sys.exit(1)
 
     logger.info(f"📂 Loading DataFrame from {path}...")
-    df = pd.read_csv(path)
+    if path.endswith(".parquet"):
+        # JSON columns are stored as JSON text, exactly as load expects them
+        df = pd.read_parquet(path, engine="pyarrow")
+    else:
+        # CSV JSON cells may be Python reprs (older exports); they are embedded verbatim, so validate them first
+        df = _reencode_json_columns(pd.read_csv(path))
     load_to_supabase(df)
@@ -0,0 +1,135 @@
+"""
+load_fast.py — Bulk-loads transformed call data straight into Postgres
+through the Supabase transaction pooler (Supavisor, port 6543).
+
+Rows are COPY'd into a temp staging table and merged into the target table
+with a single INSERT ... ON CONFLICT, which is much faster than per-batch
+REST upserts. Falls back to the REST loader when SUPABASE_DB_URL is unset.
+psycopg / psycopg_pool are only imported when the pooled path is used.
+"""
+
+import atexit
+import threading
+import pandas as pd
+from datetime import datetime, timezone
+
+from config import SUPABASE_DB_URL, SUPABASE_SCHEMA, LOAD_BATCH_SIZE, USE_RICH_LOGGING
+from load import (
+    load_to_supabase,
+    _validate_dataframe_schema,
+    _clean_dataframe,
+    TABLE_NAME,
+)
+from utils.logger_utils import get_logger
+
+__all__ = ["bulk_load_to_postgres", "close_pool"]
+
+logger = get_logger(__name__, use_rich=USE_RICH_LOGGING)
+
+STAGE_TABLE = f"_{TABLE_NAME}_stage"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Return the shared connection pool, opening it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from psycopg_pool import ConnectionPool
+
+            # Transaction-mode pooling does not support server-side prepared statements
+            _pool = ConnectionPool(
+                SUPABASE_DB_URL,
+                min_size=1,
+                max_size=4,
+                kwargs={"prepare_threshold": None},
+                open=True,
+            )
+        return _pool
+
+
+def close_pool() -> None:
+    """Close the shared connection pool, if one was opened."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+# Safety net for callers other than main, which closes the pool explicitly
+atexit.register(close_pool)
+
+
+def _iter_copy_rows(df: pd.DataFrame):
+    """Yield rows ready for COPY (JSON columns are already text), one batch of records at a time."""
+    for i in range(0, len(df), LOAD_BATCH_SIZE):
+        yield from df.iloc[i : i + LOAD_BATCH_SIZE].to_dict(orient="split")["data"]
+
+
+def bulk_load_to_postgres(df: pd.DataFrame):
+    """
+    COPY the DataFrame into a staging table and upsert it into the target table.
+    Returns the same summary shape as load_to_supabase.
+    """
+    if not SUPABASE_DB_URL:
+        logger.info("SUPABASE_DB_URL not set — falling back to REST upsert.")
+        return load_to_supabase(df)
+
+    if df.empty:
+        logger.warning("⚠️ No records to load — DataFrame is empty.")
+        return {"success": 0, "failed": 0, "audit_time": None}
+
+    if not _validate_dataframe_schema(df):
+        return {"success": 0, "failed": len(df), "audit_time": None, "error": "Schema validation failed"}
+
+    from psycopg import sql
+
+    df = _clean_dataframe(df)
+
+    audit_time = datetime.now(timezone.utc).isoformat()
+
+    columns = list(df.columns)
+    total_records = len(df)
+
+    target = sql.Identifier(SUPABASE_SCHEMA, TABLE_NAME)
+    stage = sql.Identifier(STAGE_TABLE)
+    col_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    # audit_timestamp is set in SQL on both insert and update (no column default is assumed)
+    updates = sql.SQL(", ").join(
+        [sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c)) for c in columns if c != "id"]
+        + [sql.SQL("audit_timestamp = now()")]
+    )
+
+    logger.info(f"🚀 Bulk loading {total_records} records into '{TABLE_NAME}' via pooler...")
+
+    try:
+        with _get_pool().connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                sql.SQL("CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP").format(stage, target)
+            )
+            with cur.copy(sql.SQL("COPY {} ({}) FROM STDIN").format(stage, col_list)) as copy:
+                for row in _iter_copy_rows(df):
+                    copy.write_row(row)
+
+            cur.execute(
+                sql.SQL(
+                    "INSERT INTO {target} ({cols}, audit_timestamp) SELECT {cols}, now() FROM {stage} "
+                    "ON CONFLICT (id) DO UPDATE SET {updates}"
+                ).format(target=target, cols=col_list, stage=stage, updates=updates)
+            )
+            success_count = cur.rowcount
+
+    except Exception as e:
+        logger.error(f"❌ Bulk load to Postgres failed: {e}")
+        return {"success": 0, "failed": total_records, "audit_time": None, "error": str(e)}
+
+    fail_count = total_records - success_count
+    if fail_count == 0:
+        logger.success(f"🎯 Bulk load complete — {success_count} succeeded.")
+    else:
+        logger.warning(f"⚠️ Bulk load partially complete — {success_count} succeeded, {fail_count} failed.")
+
+    return {"success": success_count, "failed": fail_count, "audit_time": audit_time}
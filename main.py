@@ -8,6 +8,10 @@ Steps:
   4. Load final dataset (with signed URLs) into Supabase table.
   5. Print a complete summary of the ETL process.
 
+Stages are pipelined page by page: extraction runs in a background thread,
+each page is transformed and uploaded as soon as it arrives, and loading of
+one page overlaps the upload of the next.
+
 Each stage is logged with success/failure stats.
 """
 
@@ -16,12 +20,23 @@ Each stage is logged with success/failure stats.
 # ──────────────────────────────────────────────────────────────────────────────
 from extract import extract_calls
 from transform import transform_calls
-from upload_audio import upload_recordings_parallel
-from load import load_to_supabase
+from upload_audio import upload_recordings_parallel, save_etag_cache
+from load_fast import bulk_load_to_postgres, close_pool
 from utils.logger_utils import get_logger
 from utils.summary_utils import print_etl_summary
-from config import USE_RICH_LOGGING
+from config import (
+    USE_RICH_LOGGING,
+    INTERMEDIATE_PARQUET,
+    INTERMEDIATE_CSV,
+    FAILED_UPLOADS_CSV,
+    PIPELINE_QUEUE_SIZE,
+)
+from collections import Counter
 import argparse
+import concurrent.futures
+import os
+import queue
+import pandas as pd
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Logger setup
@@ -29,19 +44,132 @@ import argparse
 logger = get_logger(__name__, use_rich=USE_RICH_LOGGING)
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Intermediate artifact
+# ──────────────────────────────────────────────────────────────────────────────
+
+def save_intermediate(df: pd.DataFrame, write_csv: bool = False) -> None:
+    """
+    Save the enriched dataset as Parquet (and optionally CSV for eyeballing).
+    JSON columns are already text (string[pyarrow]), so they are written as-is.
+    """
+    df.to_parquet(INTERMEDIATE_PARQUET, engine="pyarrow", compression="zstd", index=False)
+    logger.success(f"📁 Saved intermediate dataset → {INTERMEDIATE_PARQUET}")
+
+    if write_csv:
+        df.to_csv(INTERMEDIATE_CSV, index=False)
+        logger.success(f"📁 Saved intermediate dataset → {INTERMEDIATE_CSV}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Pipeline stages
+# ──────────────────────────────────────────────────────────────────────────────
+
+_END_OF_PAGES = object()
+
+
+def _extract_into_queue(pages: queue.Queue, updated_at_gt=None, updated_at_lt=None):
+    """Run extraction, handing each page to the queue; always signal the end."""
+    try:
+        return extract_calls(updated_at_gt=updated_at_gt, updated_at_lt=updated_at_lt, sink=pages.put)
+    finally:
+        pages.put(_END_OF_PAGES)
+
+
+def _transform_and_upload(calls):
+    """Transform one page of calls and upload its recordings; None if nothing to process."""
+    transform_result = transform_calls(calls)
+    df = transform_result["df"]
+    if df.empty:
+        return None
+
+    upload_result = upload_recordings_parallel(df)
+    upload_map = upload_result.get("upload_map", {})
+
+    # Map signed URLs back to DataFrame (dict lookups run in C, no per-row lambda)
+    url_map = {k: v["signed_url"] for k, v in upload_map.items()}
+    expiry_map = {k: v["signed_url_expiry"] for k, v in upload_map.items()}
+    df["signed_url"] = df["id"].map(url_map)
+    df["signed_url_expiry"] = df["id"].map(expiry_map)
+
+    return {
+        "df": df,
+        "num_transformed": transform_result.get("num_transformed", len(df)),
+        "num_existing": transform_result["num_existing"],
+        "upload_summary": upload_result.get("summary", {}),
+    }
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Main ETL pipeline
 # ──────────────────────────────────────────────────────────────────────────────
 
-def extract_transform_load_calls(updated_at_gt=None, updated_at_lt=None):
-    logger.info("🔹 Starting extraction from VAPI v2 API...")
-    extract_result = extract_calls(updated_at_gt=updated_at_gt, updated_at_lt=updated_at_lt)
+def extract_transform_load_calls(updated_at_gt=None, updated_at_lt=None, write_csv=False):
+    logger.info("🔹 Starting pipelined ETL from VAPI v2 API...")
+
+    # Failed uploads are appended page by page; start each run with a fresh file
+    if os.path.exists(FAILED_UPLOADS_CSV):
+        os.remove(FAILED_UPLOADS_CSV)
+
+    pages: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    totals: Counter = Counter()
+    upload_totals: Counter = Counter()
+    frames = []
+    load_futures = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as extract_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1) as load_pool:
+        extract_future = extract_pool.submit(_extract_into_queue, pages, updated_at_gt, updated_at_lt)
+
+        calls = None
+        try:
+            # =================================================================
+            # 2️⃣ + 3️⃣  Transform + upload each page as soon as it is extracted
+            # =================================================================
+            while (calls := pages.get()) is not _END_OF_PAGES:
+                chunk = _transform_and_upload(calls)
+                if chunk is None:
+                    continue
+
+                totals["transformed"] += chunk["num_transformed"]
+                totals["existing"] += chunk["num_existing"]
+                upload_totals.update(chunk["upload_summary"])
+                frames.append(chunk["df"])
+
+                # =============================================================
+                # 4️⃣  Load this page while the next one is transformed/uploaded
+                # =============================================================
+                load_futures.append(load_pool.submit(bulk_load_to_postgres, chunk["df"]))
+        finally:
+            # Unblock the extract thread if we stopped consuming early
+            while calls is not _END_OF_PAGES:
+                calls = pages.get()
+            # Persist source ETags once per run, including for pages uploaded before a failure
+            save_etag_cache()
+
+        extract_result = extract_future.result()
+
+        # Write the intermediate artifact on the now-idle extract thread while loads drain
+        save_future = None
+        if frames and extract_result.get("success"):
+            save_future = extract_pool.submit(
+                save_intermediate, pd.concat(frames, ignore_index=True), write_csv
+            )
+
+        try:
+            load_results = [f.result() for f in load_futures]
+            if save_future is not None:
+                save_future.result()
+        finally:
+            close_pool()
 
+    # =========================================================================
+    # 1️⃣  Extract stage outcome
+    # =========================================================================
     if not extract_result.get("success"):
         logger.error(f"❌ Extraction failed: {extract_result.get('message')}")
         return
 
-    calls = extract_result.get("calls", [])
     extract_count = extract_result.get("num_calls", 0)
     num_pages = extract_result.get("num_pages", 0)
     metadata = extract_result.get("metadata", {})
@@ -52,32 +180,16 @@ def extract_transform_load_calls(updated_at_gt=None, updated_at_lt=None):
 
     logger.success(f"✅ Extracted {extract_count} call records from VAPI across {num_pages} page(s). Metadata: {metadata}")
 
-    # =========================================================================
-    # 2️⃣  Transform stage
-    # =========================================================================
-    logger.info("🔹 Transforming extracted call data...")
-    transform_result = transform_calls(calls)
-    df = transform_result["df"]
-    num_existing = transform_result["num_existing"]
-    transform_count = transform_result.get("num_transformed", len(df))
+    transform_count = totals["transformed"]
+    num_existing = totals["existing"]
     logger.success(f"✅ Transformed {transform_count} records into DataFrame. {num_existing} already existed.")
 
-    # =========================================================================
-    # 3️⃣  Upload recordings to Supabase Storage
-    # =========================================================================
-    logger.info("🔹 Uploading recordings to Supabase Storage in parallel...")
-    upload_result = upload_recordings_parallel(df)
-
-    # Extract the structured output
-    upload_summary = upload_result.get("summary", {})
-    upload_map = upload_result.get("upload_map", {})
-
-    upload_total = upload_summary.get("total", 0)
-    upload_success = upload_summary.get("success", 0)
-    upload_uploaded = upload_summary.get("uploaded", 0)
-    upload_signed_url_generated = upload_summary.get("signed_url_generated", 0)
-    upload_skipped_no_url = upload_summary.get("skipped_no_stereo_url", 0)
-    upload_failed = upload_summary.get("failed", 0)
+    upload_total = upload_totals["total"]
+    upload_success = upload_totals["success"]
+    upload_uploaded = upload_totals["uploaded"]
+    upload_signed_url_generated = upload_totals["signed_url_generated"]
+    upload_skipped_no_url = upload_totals["skipped_no_stereo_url"]
+    upload_failed = upload_totals["failed"]
 
     logger.success(
         f"✅ Upload stage completed — Total={upload_total}, "
@@ -85,23 +197,9 @@ def extract_transform_load_calls(updated_at_gt=None, updated_at_lt=None):
         f"Skipped (no URL)={upload_skipped_no_url}, Failed={upload_failed}"
     )
 
-    # Map signed URLs back to DataFrame
-    df["signed_url"] = df["id"].map(lambda x: upload_map.get(x, {}).get("signed_url"))
-    df["signed_url_expiry"] = df["id"].map(lambda x: upload_map.get(x, {}).get("signed_url_expiry"))
-
-    # Save intermediate result
-    df.to_csv("calls_with_recordings.csv", index=False)
-    logger.success("📁 Saved intermediate dataset → calls_with_recordings.csv")
-
-    # =========================================================================
-    # 4️⃣  Load final dataset into Supabase table
-    # =========================================================================
-    logger.info("🔹 Loading transformed dataset into Supabase table...")
-    load_result = load_to_supabase(df)
-
-    load_success = load_result.get("success", 0)
-    load_failed = load_result.get("failed", 0)
-    audit_time = load_result.get("audit_time")
+    load_success = sum(r.get("success", 0) for r in load_results)
+    load_failed = sum(r.get("failed", 0) for r in load_results)
+    audit_time = next((r["audit_time"] for r in reversed(load_results) if r.get("audit_time")), None)
 
     if load_failed == 0:
         logger.success(f"✅ Load completed successfully at {audit_time}.")
@@ -139,5 +237,6 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="VAPI ETL Pipeline")
     parser.add_argument("--updated_at_gt", type=str, default=None, help="Extract calls updated after this UTC timestamp (e.g. 2025-10-23T16:00:00Z)")
     parser.add_argument("--updated_at_lt", type=str, default=None, help="Extract calls updated before this UTC timestamp (e.g. 2025-10-25T00:00:00Z)")
+    parser.add_argument("--csv", action="store_true", help=f"Also write the intermediate dataset to {INTERMEDIATE_CSV}")
     args = parser.parse_args()
-    extract_transform_load_calls(updated_at_gt=args.updated_at_gt, updated_at_lt=args.updated_at_lt)
+    extract_transform_load_calls(updated_at_gt=args.updated_at_gt, updated_at_lt=args.updated_at_lt, write_csv=args.csv)
@@ -1,7 +1,8 @@
 # refresh_signed_urls.py
 import sys
 from datetime import datetime, timedelta, timezone
-from config import supabase, BUCKET_NAME, USE_RICH_LOGGING
+from config import USE_RICH_LOGGING
+from upload_audio import _get_bucket, _generate_signed_urls_bulk
 from utils.logger_utils import get_logger
 
 logger = get_logger(__name__, use_rich=USE_RICH_LOGGING)
@@ -15,7 +16,7 @@ def refresh_signed_url(call_id: str, expiry_hours: int = 24):
     ✅ Returns signed URL and expiry timestamp (ISO UTC)
     """
     try:
-        bucket = supabase.storage.from_(BUCKET_NAME)
+        bucket = _get_bucket()
         filename = f"{call_id}.mp3"
 
         # Generate a new signed URL that expires after expiry_hours
@@ -42,6 +43,24 @@ def refresh_signed_url(call_id: str, expiry_hours: int = 24):
         return {"signed_url": None, "signed_url_expiry": None}
 
 
+def refresh_signed_urls(call_ids: list[str], expiry_hours: int = 24):
+    """
+    Bulk variant of refresh_signed_url: one create_signed_urls request per batch of files.
+    Returns {call_id: {"signed_url", "signed_url_expiry"}}; missing/unsigned files map to None values.
+    """
+    signed = _generate_signed_urls_bulk(list(call_ids), expires_in=expiry_hours * 3600)
+
+    results = {}
+    for call_id in call_ids:
+        signed_url, expiry_iso = signed.get(call_id, (None, None))
+        if not signed_url:
+            logger.error(f"[FAILED] Could not refresh signed URL for {call_id}")
+        results[call_id] = {"signed_url": signed_url, "signed_url_expiry": expiry_iso}
+
+    logger.success(f"SUCCESS: Refreshed {len(signed)}/{len(call_ids)} signed URLs")
+    return results
+
+
 def main():
     """
     Command-line interface for refreshing a signed URL.
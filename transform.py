@@ -12,10 +12,17 @@ Author: Ronak (refactored for readability, testability, and type safety)
 """
 
 from __future__ import annotations
+import concurrent.futures
+import orjson
 import pandas as pd
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 from utils.logger_utils import get_logger
-from config import USE_RICH_LOGGING, get_supabase_client
+from config import (
+    USE_RICH_LOGGING,
+    EXISTING_CHECK_BATCH_SIZE,
+    EXISTING_CHECK_MAX_WORKERS,
+    get_supabase_client,
+)
 
 __all__ = ["transform_calls"]
 
@@ -25,68 +32,92 @@ logger = get_logger(__name__, use_rich=USE_RICH_LOGGING)
 # 🧩 HELPER FUNCTIONS
 # --------------------------------------------------------------------------
 
-def _parse_duration(started_at: Optional[str], ended_at: Optional[str], call_id: Optional[str] = None) -> Optional[float]:
+def _to_utc(ts: Any) -> pd.Series:
     """
-    Safely compute call duration (in seconds) between start and end timestamps.
-    Returns None if timestamps are missing or invalid.
+    Parse a column of ISO 8601 timestamps to tz-aware UTC in one vectorized pass.
+    Malformed or missing values become NaT.
     """
-    if not started_at or not ended_at:
-        return None
-    try:
-        start = pd.to_datetime(started_at)
-        end = pd.to_datetime(ended_at)
-        return (end - start).total_seconds()
-    except Exception as e:
-        logger.debug(f"Failed to parse duration for call_id={call_id}: {e}")
-        return None
-
-
-def _build_row(c: Dict[str, Any]) -> Dict[str, Any]:
+    return pd.to_datetime(ts, utc=True, errors="coerce", format="ISO8601")
+
+
+# Output column -> (raw VAPI key, default). Order here is the DataFrame column order;
+# "duration" is derived after the pass and "jsonb" holds the full raw call as JSON text.
+# All *_json / jsonb columns are stored as JSON text (Arrow strings), not nested dicts.
+_COLUMN_SOURCES: Dict[str, tuple[Optional[str], Any]] = {
+    "id": ("id", None),
+    "assistant_id": ("assistantId", None),
+    "type": ("type", None),
+    "org_id": ("orgId", None),
+    "campaign_id": ("campaignId", None),
+    "status": ("status", None),
+    "ended_reason": ("endedReason", None),
+    "created_at": ("createdAt", None),
+    "started_at": ("startedAt", None),
+    "ended_at": ("endedAt", None),
+    "updated_at": ("updatedAt", None),
+    "duration": (None, None),
+    "stereo_recording_url": ("stereoRecordingUrl", None),
+    "transcript": ("transcript", None),
+    "summary": ("summary", None),
+    "cost": ("cost", None),
+    "customer_json": ("customer", {}),
+    "assistant_number_json": ("assistantPhoneNumber", {}),
+    "analysis_json": ("analysis", {}),
+    "jsonb": (None, None),  # full raw call JSON text (for backup/reference)
+}
+_EXTRACTED_COLUMNS = tuple(
+    (name, key, default) for name, (key, default) in _COLUMN_SOURCES.items() if key is not None
+)
+_NESTED_JSON_COLUMNS = ("customer_json", "assistant_number_json", "analysis_json")
+# Pinned to double so a page of whole-number values (or all nulls) doesn't become int/null
+_FLOAT_COLUMNS = {"duration": "double[pyarrow]", "cost": "double[pyarrow]"}
+
+
+def _build_columns(calls: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
     """
-    Build a single normalized dictionary row from a raw VAPI call record.
+    Collect raw VAPI call records into one list per output column (dict-of-lists),
+    avoiding a per-row dict that pandas would re-hash on construction.
+    A call that fails to serialize is skipped whole, so columns never fall out of step.
     """
-    started_at = c.get("startedAt")
-    ended_at = c.get("endedAt")
-    duration = _parse_duration(started_at, ended_at, c.get("id"))
-
-    return {
-        "id": c.get("id"),
-        "assistant_id": c.get("assistantId"),
-        "type": c.get("type"),
-        "org_id": c.get("orgId"),
-        "campaign_id": c.get("campaignId"),
-        "status": c.get("status"),
-        "ended_reason": c.get("endedReason"),
-        "created_at": c.get("createdAt"),
-        "started_at": started_at,
-        "ended_at": ended_at,
-        "updated_at": c.get("updatedAt"),
-        "duration": duration,
-        "stereo_recording_url": c.get("stereoRecordingUrl"),
-        "transcript": c.get("transcript"),
-        "summary": c.get("summary"),
-        "cost": c.get("cost"),
-        "customer_json": c.get("customer", {}),
-        "assistant_number_json": c.get("assistantPhoneNumber", {}),
-        "analysis_json": c.get("analysis", {}),
-        "jsonb": c,  # full raw call JSON (for backup/reference)
-    }
-
-
-def _normalize_timestamp(ts: Any) -> Optional[str]:
+    cols: Dict[str, List[Any]] = {name: [] for name in _COLUMN_SOURCES}
+    for c in calls:
+        if not isinstance(c, dict):
+            logger.error(f"Skipping malformed call record of type {type(c).__name__}")
+            continue
+        values = {name: c.get(key, default) for name, key, default in _EXTRACTED_COLUMNS}
+        try:
+            # Serialize nested objects to JSON text; an explicit JSON null stays None (SQL NULL)
+            for name in _NESTED_JSON_COLUMNS:
+                if values[name] is not None:
+                    values[name] = orjson.dumps(values[name]).decode()
+            # Serialize once here rather than keeping every nested raw payload alive as dicts
+            values["jsonb"] = orjson.dumps(c).decode()
+        except orjson.JSONEncodeError as e:
+            logger.error(f"Skipping call {c.get('id')}: could not serialize to JSON — {e}")
+            continue
+        # Every value is ready: append the whole row at once
+        for name, value in values.items():
+            cols[name].append(value)
+
+    # One vectorized parse per column; missing/malformed timestamps give NaN duration.
+    started = _to_utc(pd.Series(cols["started_at"], dtype=object))
+    ended = _to_utc(pd.Series(cols["ended_at"], dtype=object))
+    cols["duration"] = (ended - started).dt.total_seconds().to_numpy()
+    return cols
+
+
+def _existence_keys(df: pd.DataFrame) -> pd.Series:
     """
-    Normalize a timestamp into ISO 8601 string format for comparison.
-    Returns None if timestamp is invalid.
+    Build one "id|updated_at" string key per row for existence checks, with updated_at
+    normalized to UTC epoch nanoseconds so 'Z' and '+00:00' spellings compare equal.
+    Rows with a missing or unparseable timestamp get NA and never match.
     """
-    if pd.isna(ts):
-        return None
-    try:
-        return pd.to_datetime(ts, utc=True).isoformat()
-    except Exception:
-        return str(ts)
+    ts = _to_utc(df["updated_at"]).dt.as_unit("ns")
+    epoch_ns = ts.fillna(pd.Timestamp(0, tz="UTC")).astype("int64").astype(str)
+    return (df["id"].astype(str) + "|" + epoch_ns).where(ts.notna())
 
 
-def _fetch_existing_records(df: pd.DataFrame) -> Dict[tuple[str, str], bool]:
+def _fetch_existing_records(df: pd.DataFrame) -> set[str]:
     """
     Query Supabase to identify already existing records by (id, updated_at).
 
@@ -94,59 +125,58 @@ def _fetch_existing_records(df: pd.DataFrame) -> Dict[tuple[str, str], bool]:
         df: DataFrame containing transformed call data.
 
     Returns:
-        A dictionary lookup of (id, updated_at_iso) → True for fast existence checks.
+        A set of "id|updated_at" keys (see _existence_keys) for vectorized isin checks.
     """
     if df.empty:
-        return {}
+        return set()
 
     supabase = get_supabase_client()
     ids = df["id"].dropna().unique().tolist()
     logger.info(f"🔎 Checking {len(ids)} records for existence in Supabase...")
 
-    existing_records: List[Dict[str, Any]] = []
-    BATCH_SIZE = 100
-
-    for i in range(0, len(ids), BATCH_SIZE):
-        batch_ids = ids[i:i + BATCH_SIZE]
+    def fetch_batch(batch_ids: List[str]) -> List[Dict[str, Any]]:
         resp = supabase.table("ai_calls").select("id,updated_at").in_("id", batch_ids).execute()
-        if hasattr(resp, "data") and resp.data:
-            existing_records.extend(resp.data)
+        return resp.data if hasattr(resp, "data") and resp.data else []
+
+    # Batches are independent round-trips: keep several in flight on the shared client
+    batches = [ids[i:i + EXISTING_CHECK_BATCH_SIZE] for i in range(0, len(ids), EXISTING_CHECK_BATCH_SIZE)]
+    existing_records: List[Dict[str, Any]] = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=EXISTING_CHECK_MAX_WORKERS) as executor:
+        for records in executor.map(fetch_batch, batches):
+            existing_records.extend(records)
 
     logger.info(f"Found {len(existing_records)} existing records in DB.")
-    return {(r["id"], _normalize_timestamp(r["updated_at"])): True for r in existing_records}
+    if not existing_records:
+        return set()
 
+    existing_df = pd.DataFrame(existing_records, columns=["id", "updated_at"])
+    return set(_existence_keys(existing_df).dropna())
 
-def _mark_existing_records(df: pd.DataFrame, existing_lookup: Dict[tuple[str, str], bool]) -> pd.DataFrame:
+
+def _mark_existing_records(df: pd.DataFrame, existing_keys: set[str]) -> pd.DataFrame:
     """
     Add a boolean column 'already_existing_in_db' to flag duplicate rows.
 
     Args:
         df: Transformed DataFrame.
-        existing_lookup: Dictionary of existing (id, updated_at) records.
+        existing_keys: Set of existing "id|updated_at" keys.
 
     Returns:
         Updated DataFrame with new column 'already_existing_in_db'.
     """
-    def is_existing(row: pd.Series) -> bool:
-        key = (row["id"], _normalize_timestamp(row["updated_at"]))
-        exists = existing_lookup.get(key, False)
-        if not exists:
-            logger.debug(f"Not found in DB: id={row['id']} updated_at={row['updated_at']}")
-        return exists
-
-    df["already_existing_in_db"] = df.apply(is_existing, axis=1)
+    df["already_existing_in_db"] = _existence_keys(df).isin(existing_keys)
     return df
 
 # --------------------------------------------------------------------------
 # 🚀 MAIN TRANSFORM FUNCTION
 # --------------------------------------------------------------------------
 
-def transform_calls(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+def transform_calls(calls: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Transform raw VAPI call JSON into a cleaned DataFrame, mark duplicates, and return summary.
 
     Args:
-        calls: List of raw VAPI call JSON objects.
+        calls: Raw VAPI call JSON objects (a list or any one-shot iterable).
 
     Returns:
         dict:
@@ -156,28 +186,22 @@ def transform_calls(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
                 "num_new_or_updated": int  # count of new or changed records
             }
     """
-    if not calls:
-        logger.warning("No calls provided to transform.")
-        return {"df": pd.DataFrame(), "num_existing": 0, "num_new_or_updated": 0}
-
-
-    logger.info(f"Transforming {len(calls)} raw call records...")
+    logger.info("Transforming raw call records...")
 
     # --- Step 1: Build DataFrame ---
-    rows: List[Dict[str, Any]] = []
-    for c in calls:
-        try:
-            rows.append(_build_row(c))
-        except Exception as e:
-            logger.error(f"Error processing call {c.get('id')}: {e}")
+    cols = _build_columns(calls)
 
-    df = pd.DataFrame(rows)
+    if not cols["id"]:
+        logger.warning("No calls provided to transform.")
+        return {"df": pd.DataFrame(), "num_existing": 0, "num_new_or_updated": 0}
+
+    df = pd.DataFrame(cols, copy=False)
     logger.info(f"✅ Transform complete — {len(df)} rows created.")
     num_transformed = len(df)
 
     # --- Step 2: Check existing records ---
-    existing_lookup = _fetch_existing_records(df)
-    df = _mark_existing_records(df, existing_lookup)
+    existing_keys = _fetch_existing_records(df)
+    df = _mark_existing_records(df, existing_keys)
 
     #
 
@@ -189,6 +213,10 @@ def transform_calls(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
     if "already_existing_in_db" in df.columns:
         df.drop(columns=["already_existing_in_db"], inplace=True)
 
+    # Arrow-backed dtypes: compact string/number buffers instead of boxed Python objects.
+    # JSON columns are already text, so they become string[pyarrow] too.
+    df = df.convert_dtypes(dtype_backend="pyarrow", convert_integer=False).astype(_FLOAT_COLUMNS)
+
     return {
         "df": df,
         "num_existing": num_existing,
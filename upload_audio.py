@@ -3,7 +3,7 @@
 🎵 Upload Audio Stage for VAPI → Supabase ETL
 
 Handles concurrent uploads of stereo MP3 recordings to Supabase Storage with:
-- Pre-check using HEAD requests (O(1), memory-safe)
+- Pre-check against a single paginated bucket listing (no per-file HEAD)
 - Parallel uploads with retry and backoff
 - Signed URL generation and expiry tracking
 - Clear reason-based skip reporting
@@ -13,10 +13,21 @@ Author: Ronak (optimized for performance & clarity)
 
 from __future__ import annotations
 import concurrent.futures
+import csv
+import functools
+import heapq
+import itertools
+from enum import IntEnum
+import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
 import random
+import jwt
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 from typing import Any, Dict, Optional
@@ -25,121 +36,453 @@ from config import (
     get_supabase_client,
     SUPABASE_URL,
     SUPABASE_SERVICE_KEY,
+    SUPABASE_JWT_SECRET,
     BUCKET_NAME,
     MAX_RETRIES,
     BACKOFF_BASE,
+    MAX_BACKOFF,
     MAX_WORKERS,
     FAILED_UPLOADS_CSV,
     USE_RICH_LOGGING,
     SIGNED_URL_EXPIRY_HOURS,
+    SIGNED_URL_CACHE_PARQUET,
+    SIGNED_URL_CACHE_MARGIN_HOURS,
+    RECORDING_ETAG_CACHE_PARQUET,
+    RECORDING_ETAG_CACHE_MAX_AGE_DAYS,
 )
 from utils.logger_utils import get_logger
 
-__all__ = ["upload_recordings_parallel"]
+__all__ = ["upload_recordings_parallel", "save_etag_cache"]
 
 logger = get_logger(__name__, use_rich=USE_RICH_LOGGING)
 
-# Cache to avoid redundant HEAD requests in the same batch
-_seen_existing_files: set[str] = set()
+# One HTTP session per worker thread (requests.Session isn't guaranteed thread-safe).
+# Each keeps its own keep-alive connections to the source host and Storage;
+# only connection setup is retried here, HTTP errors go through upload_task's retry loop.
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """Return this thread's HTTP session, creating it on first use."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(
+            pool_connections=2,  # recording source + Supabase Storage
+            pool_maxsize=2,
+            max_retries=Retry(total=None, connect=MAX_RETRIES, read=0, status=0, other=0, backoff_factor=0.5),
+        ))
+        _thread_local.session = session
+    return session
+
+
+STORAGE_OBJECT_URL = f"{SUPABASE_URL}/storage/v1/object/{BUCKET_NAME}"
+STORAGE_SIGN_URL = f"{SUPABASE_URL}/storage/v1/object/sign/{BUCKET_NAME}"
+STREAM_CHUNK_SIZE = 256 * 1024
+# Built once: service-key auth, plus upload options (x-upsert overwrites if forced)
+_STORAGE_AUTH_HEADERS = {
+    "apikey": SUPABASE_SERVICE_KEY,
+    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+}
+_UPLOAD_HEADERS = {
+    **_STORAGE_AUTH_HEADERS,
+    "Content-Type": "audio/mpeg",
+    "x-upsert": "true",
+}
+
+BUCKET_LIST_PAGE_SIZE = 1000
+SIGNED_URL_BATCH_SIZE = 1000
+
+
+class UploadStatus(IntEnum):
+    """Per-recording outcome; the lowercased name is the key used in the upload summary."""
+    UPLOADED = 0
+    SIGNED_URL_GENERATED = 1  # already in bucket
+    SKIPPED_NO_STEREO_URL = 2
+    FAILED = 3
+
+
+# Task statuses whose file is in the bucket afterwards and needs a signed URL
+_SIGNED_STATUSES = frozenset({UploadStatus.UPLOADED, UploadStatus.SIGNED_URL_GENERATED})
+
+# Filenames known to be in the bucket: listed once per process, then kept
+# current as uploads succeed (see _get_existing_files)
+_existing_files: Optional[set[str]] = None
+_existing_files_lock = threading.Lock()
+
+# call_id → source ETag of the recording last uploaded, persisted to RECORDING_ETAG_CACHE_PARQUET
+_etag_cache: Optional[Dict[str, tuple[str, float]]] = None
+_etag_cache_dirty = False
+_etag_cache_lock = threading.Lock()
+
+# Serializes writes to FAILED_UPLOADS_CSV (header is written only by the first append)
+_failed_csv_lock = threading.Lock()
+
+# call_id → (signed_url, expiry_iso), persisted to SIGNED_URL_CACHE_PARQUET between runs
+_signed_url_cache: Optional[Dict[str, tuple[str, str]]] = None
+_signed_url_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_bucket():
+    """Storage bucket handle shared by every helper and worker thread (built on first use)."""
+    return get_supabase_client().storage.from_(BUCKET_NAME)
 
 
 # ============================================================================
-# 🧩 Helper: Check if file exists (constant-time HEAD request)
+# 🧩 Helper: List bucket contents (paginated, one request per 1000 objects)
 # ============================================================================
-def _file_exists_in_bucket(call_id: str) -> bool:
+def _list_bucket_files() -> set[str]:
     """
-    Check if the MP3 file already exists in Supabase Storage using a lightweight HEAD request.
-    Works for private buckets using service key authentication.
+    Collect every filename in the bucket root via paginated list() calls.
+    Replaces one HEAD request per recording with ceil(N / 1000) list requests.
     """
-    if call_id in _seen_existing_files:
-        return True
+    bucket = _get_bucket()
+    names: set[str] = set()
+    offset = 0
+    while True:
+        page = bucket.list("", {
+            "limit": BUCKET_LIST_PAGE_SIZE,
+            "offset": offset,
+            "sortBy": {"column": "name", "order": "asc"},
+        })
+        names.update(obj["name"] for obj in page)
+        if len(page) < BUCKET_LIST_PAGE_SIZE:
+            return names
+        offset += BUCKET_LIST_PAGE_SIZE
+
+
+def _get_existing_files() -> set[str]:
+    """Return the shared set of existing filenames, listing the bucket on first use."""
+    global _existing_files
+    with _existing_files_lock:
+        if _existing_files is None:
+            try:
+                _existing_files = _list_bucket_files()
+                logger.info(f"🔎 Found {len(_existing_files)} recordings already in bucket.")
+            except Exception as e:
+                # Fall back to uploading everything (uploads are upserts)
+                logger.warning(f"⚠️ Could not list bucket {BUCKET_NAME}: {e}")
+                return set()
+        return _existing_files
 
-    filename = f"{call_id}.mp3"
-    storage_url = f"{SUPABASE_URL}/storage/v1/object/{BUCKET_NAME}/{filename}"
 
-    headers = {
-        "apikey": SUPABASE_SERVICE_KEY,
-        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-    }
+# ============================================================================
+# 🧩 Helper: Persistent signed URL cache (skips sign requests on reruns)
+# ============================================================================
+def _get_signed_url_cache() -> Dict[str, tuple[str, str]]:
+    """Return the shared signed URL cache, reading it from Parquet on first use."""
+    global _signed_url_cache
+    with _signed_url_cache_lock:
+        if _signed_url_cache is None:
+            _signed_url_cache = {}
+            if os.path.exists(SIGNED_URL_CACHE_PARQUET):
+                try:
+                    cache_df = pd.read_parquet(SIGNED_URL_CACHE_PARQUET, engine="pyarrow")
+                    _signed_url_cache = dict(zip(
+                        cache_df["id"], zip(cache_df["signed_url"], cache_df["signed_url_expiry"])
+                    ))
+                    logger.info(f"🗂️ Loaded {len(_signed_url_cache)} cached signed URLs.")
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not read {SIGNED_URL_CACHE_PARQUET}: {e}")
+        return _signed_url_cache
+
+
+def _signed_url_reuse_cutoff() -> datetime:
+    """Earliest expiry a cached URL may have and still be reused (minted within the margin)."""
+    return datetime.now(timezone.utc) + timedelta(
+        hours=SIGNED_URL_EXPIRY_HOURS - SIGNED_URL_CACHE_MARGIN_HOURS
+    )
+
+
+def _valid_cached_urls(call_ids) -> Dict[str, tuple[str, str]]:
+    """Cached (signed_url, expiry_iso) for the given ids that still have nearly a full lifetime left."""
+    cache = _get_signed_url_cache()
+    cutoff = _signed_url_reuse_cutoff()
+    valid = {}
+    for call_id in call_ids:
+        entry = cache.get(call_id)
+        if entry and datetime.fromisoformat(entry[1]) > cutoff:
+            valid[call_id] = entry
+    return valid
 
+
+def _update_signed_url_cache(new_entries: Dict[str, tuple[str, str]]) -> None:
+    """
+    Merge freshly signed URLs into the cache and rewrite the Parquet file.
+    Entries past the reuse cutoff can never be served again, so they are pruned.
+    """
+    if not new_entries:
+        return
+    cache = _get_signed_url_cache()
+    cutoff = _signed_url_reuse_cutoff()
+    with _signed_url_cache_lock:
+        cache.update(new_entries)
+        stale = [call_id for call_id, (_, expiry) in cache.items() if datetime.fromisoformat(expiry) <= cutoff]
+        for call_id in stale:
+            del cache[call_id]
+        cache_df = pd.DataFrame(
+            [(call_id, url, expiry) for call_id, (url, expiry) in cache.items()],
+            columns=["id", "signed_url", "signed_url_expiry"],
+        )
     try:
-        resp = requests.head(storage_url, headers=headers, timeout=10)
-        if resp.status_code == 200:
-            _seen_existing_files.add(call_id)
-            return True
-        elif resp.status_code == 404:
-            return False
-        else:
-            logger.warning(
-                f"⚠️ Unexpected response {resp.status_code} while checking file {filename}"
-            )
+        cache_df.to_parquet(SIGNED_URL_CACHE_PARQUET, engine="pyarrow", index=False)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not write {SIGNED_URL_CACHE_PARQUET}: {e}")
+
+
+# ============================================================================
+# 🧩 Helper: Source ETag cache (skips re-transferring unchanged recordings)
+# ============================================================================
+def _get_etag_cache() -> Dict[str, tuple[str, float]]:
+    """
+    Return the shared call_id → (source ETag, uploaded_at epoch) map, reading it from
+    Parquet on first use. Entries older than RECORDING_ETAG_CACHE_MAX_AGE_DAYS are dropped.
+    """
+    global _etag_cache, _etag_cache_dirty
+    with _etag_cache_lock:
+        if _etag_cache is None:
+            _etag_cache = {}
+            if os.path.exists(RECORDING_ETAG_CACHE_PARQUET):
+                try:
+                    cache_df = pd.read_parquet(RECORDING_ETAG_CACHE_PARQUET, engine="pyarrow")
+                    cutoff = time.time() - RECORDING_ETAG_CACHE_MAX_AGE_DAYS * 86400
+                    # Files written before ages were recorded have no uploaded_at: treat as expired
+                    if "uploaded_at" not in cache_df.columns:
+                        cache_df["uploaded_at"] = 0.0
+                    fresh = cache_df[cache_df["uploaded_at"].fillna(0.0) >= cutoff]
+                    _etag_cache = dict(zip(fresh["id"], zip(fresh["etag"], fresh["uploaded_at"])))
+                    _etag_cache_dirty = len(fresh) != len(cache_df)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not read {RECORDING_ETAG_CACHE_PARQUET}: {e}")
+        return _etag_cache
+
+
+def _remember_etag(call_id: str, etag: str) -> None:
+    """Record the source ETag of a recording that was just uploaded."""
+    global _etag_cache_dirty
+    cache = _get_etag_cache()
+    with _etag_cache_lock:
+        cache[call_id] = (etag, time.time())
+        _etag_cache_dirty = True
+
+
+def save_etag_cache() -> None:
+    """
+    Rewrite the ETag Parquet file if uploads changed it. Called once at the end of a run
+    (not per page), so the cost of a run doesn't grow with the size of the history.
+    """
+    global _etag_cache_dirty
+    with _etag_cache_lock:
+        if not _etag_cache_dirty or _etag_cache is None:
+            return
+        cache_df = pd.DataFrame(
+            [(call_id, etag, uploaded_at) for call_id, (etag, uploaded_at) in _etag_cache.items()],
+            columns=["id", "etag", "uploaded_at"],
+        )
+        _etag_cache_dirty = False
+    try:
+        cache_df.to_parquet(RECORDING_ETAG_CACHE_PARQUET, engine="pyarrow", index=False)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not write {RECORDING_ETAG_CACHE_PARQUET}: {e}")
+
+
+def _source_unchanged_and_uploaded(session: requests.Session, call_id: str, url: str) -> bool:
+    """
+    True if we previously uploaded this call's recording from a source whose ETag
+    still matches, and the object is still in the bucket. Costs two HEADs, and only
+    for calls with a cached ETag — far cheaper than re-moving the MP3 body.
+    A failed HEAD is treated as "changed" so the attempt falls through to a normal transfer.
+    """
+    cached_etag, _ = _get_etag_cache().get(call_id, (None, None))
+    if not cached_etag:
+        return False
+    try:
+        head = session.head(url, timeout=10, allow_redirects=True)
+        if not head.ok or head.headers.get("ETag") != cached_etag:
             return False
+        stored = session.head(f"{STORAGE_OBJECT_URL}/{call_id}.mp3", headers=_STORAGE_AUTH_HEADERS, timeout=10)
+        return stored.ok
     except requests.RequestException as e:
-        logger.warning(f"⚠️ Could not verify file existence for {call_id}: {e}")
+        logger.debug(f"ETag check failed for {call_id}, transferring anyway: {e}")
         return False
 
 
 # ============================================================================
-# 🧩 Helper: Generate signed URL for existing file
+# 🧩 Helper: Sign a URL locally (same token the Storage sign endpoint issues)
 # ============================================================================
-def _generate_signed_url(call_id: str) -> tuple[Optional[str], Optional[str]]:
+def _local_signed_url(call_id: str, expires_in: int) -> tuple[str, str]:
     """
-    Generate a signed URL for an existing file in the bucket.
-    Returns (signed_url, expiry_time_iso) if successful.
+    Mint a Storage signed URL without a network call: an HS256 JWT over
+    {"url": "<bucket>/<file>", "iat", "exp"} signed with SUPABASE_JWT_SECRET.
+    Returns (signed_url, expiry_time_iso).
     """
     filename = f"{call_id}.mp3"
-    supabase = get_supabase_client()
-    bucket = supabase.storage.from_(BUCKET_NAME)
+    issued_at = int(time.time())
+    token = jwt.encode(
+        {"url": f"{BUCKET_NAME}/{filename}", "iat": issued_at, "exp": issued_at + expires_in},
+        SUPABASE_JWT_SECRET,
+        algorithm="HS256",
+    )
+    expiry_time = datetime.fromtimestamp(issued_at + expires_in, tz=timezone.utc)
+    return f"{STORAGE_SIGN_URL}/{filename}?token={token}", expiry_time.isoformat()
+
+
+# ============================================================================
+# 🧩 Helper: Generate signed URLs in bulk
+# ============================================================================
+def _generate_signed_urls_bulk(
+    call_ids: list[str], expires_in: int = SIGNED_URL_EXPIRY_HOURS * 3600
+) -> Dict[str, tuple[str, str]]:
+    """
+    Sign many bucket files with one create_signed_urls request per SIGNED_URL_BATCH_SIZE paths,
+    or entirely locally when SUPABASE_JWT_SECRET is configured.
+    Returns {call_id: (signed_url, expiry_time_iso)}; files that could not be signed are omitted.
+    """
+    if not call_ids:
+        return {}
+
+    if SUPABASE_JWT_SECRET:
+        return {call_id: _local_signed_url(call_id, expires_in) for call_id in call_ids}
+
+    bucket = _get_bucket()
+    signed: Dict[str, tuple[str, str]] = {}
+
+    for i in range(0, len(call_ids), SIGNED_URL_BATCH_SIZE):
+        batch = call_ids[i:i + SIGNED_URL_BATCH_SIZE]
+        try:
+            items = bucket.create_signed_urls([f"{call_id}.mp3" for call_id in batch], expires_in)
+        except Exception as e:
+            logger.error(f"Failed to generate {len(batch)} signed URLs: {e}")
+            continue
+
+        expiry_time = (datetime.now(timezone.utc) + timedelta(seconds=expires_in)).isoformat()
+        for item in items:
+            signed_url = item.get("signedURL") or item.get("signedUrl") or item.get("signed_url")
+            path = item.get("path") or ""
+            if signed_url and path.endswith(".mp3"):
+                signed[path[:-len(".mp3")]] = (signed_url, expiry_time)
+
+    logger.success(f"Generated {len(signed)}/{len(call_ids)} signed URLs")
+    return signed
+
+
+# ============================================================================
+# 🧩 Helper: Stream failed uploads to CSV
+# ============================================================================
+FAILED_UPLOAD_COLUMNS = ("id", "stereo_recording_url", "error")
+
+
+class FailedUploadLog:
+    """
+    Append-only writer for FAILED_UPLOADS_CSV. Opens the file on the first failure
+    (header only if the file is new) and flushes every row, so long runs can be tailed live.
+    An existing file with a different header is moved aside rather than appended to.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or FAILED_UPLOADS_CSV
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def _rotate_if_incompatible(self) -> None:
+        """Move an existing file aside if its header isn't FAILED_UPLOAD_COLUMNS (e.g. the old 2-column layout)."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, newline="", encoding="utf-8") as f:
+            header = tuple(next(csv.reader(f), ()))
+        if header == FAILED_UPLOAD_COLUMNS:
+            return
+        root, ext = os.path.splitext(self.path)
+        rotated = f"{root}.{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}{ext}"
+        os.replace(self.path, rotated)
+        logger.warning(f"⚠️ {self.path} had columns {list(header)}; moved it to {rotated}")
+
+    def write(self, call_id: str, stereo_url: Optional[str], error: Optional[str]) -> None:
+        with _failed_csv_lock:
+            if self._file is None:
+                self._rotate_if_incompatible()
+                include_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                self._file = open(self.path, "a", newline="", encoding="utf-8")
+                self._writer = csv.writer(self._file)
+                if include_header:
+                    self._writer.writerow(FAILED_UPLOAD_COLUMNS)
+            self._writer.writerow((call_id, stereo_url, error))
+            self._file.flush()
+            self.count += 1
+
+    def close(self) -> None:
+        with _failed_csv_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# ============================================================================
+# 🧩 Helper: Retry timing
+# ============================================================================
+_RETRY_AFTER_STATUSES = frozenset({429, 503})
 
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Numeric Retry-After from the 429/503 response behind an upload failure, if any."""
+    cause = exc.__cause__ if isinstance(exc.__cause__, requests.HTTPError) else None
+    resp = getattr(cause, "response", None)
+    if resp is None or resp.status_code not in _RETRY_AFTER_STATUSES:
+        return None
     try:
-        expires_in = SIGNED_URL_EXPIRY_HOURS * 3600
-        signed_url_data = bucket.create_signed_url(filename, expires_in=expires_in)
-        signed_url = signed_url_data.get("signedURL") or signed_url_data.get("signed_url")
-        expiry_time = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-        
-        logger.success(f"Generated signed URL for {call_id}")
-        return signed_url, expiry_time.isoformat()
-    except Exception as e:
-        logger.error(f"Failed to generate signed URL for {call_id}: {e}")
-        return None, None
+        return float(resp.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _next_backoff(prev_wait: float) -> float:
+    """Decorrelated jitter: uniform in [BACKOFF_BASE, 3 * previous wait], capped at MAX_BACKOFF."""
+    return min(MAX_BACKOFF, random.uniform(BACKOFF_BASE, prev_wait * 3))
 
 
 # ============================================================================
 # 🧩 Helper: Upload a single file (download + upload)
 # ============================================================================
-def _upload_recording(call_id: str, url: str) -> tuple[Optional[str], Optional[str]]:
+def _upload_recording(call_id: str, url: str) -> bool:
     """
-    Download MP3 and upload to Supabase Storage.
-    Returns (signed_url, expiry_time_iso) if successful.
+    Stream MP3 from the source URL into Supabase Storage.
+    Returns False if the unchanged recording was already uploaded (nothing transferred).
+    Raises RuntimeError on failure; signed URLs are generated afterwards in bulk.
     """
     filename = f"{call_id}.mp3"
-    supabase = get_supabase_client()
-    bucket = supabase.storage.from_(BUCKET_NAME)
+    session = _get_session()
 
     try:
-        # Download directly
-        resp = requests.get(url, timeout=30)
-        resp.raise_for_status()
-        file_content = resp.content
-
-        # Upload with upsert (True means overwrite if forced)
-        bucket.upload(filename, file_content, {"upsert": "true"})
-
-        # Generate signed URL
-        signed_url, expiry_time = _generate_signed_url(call_id)
-        if signed_url:
-            logger.success(f"Uploaded {call_id}")
-        return signed_url, expiry_time
-
-    except OSError as e:
-        if getattr(e, "winerror", None) == 10035:
-            logger.warning(f"[SOCKET] Temporary network congestion for {call_id}, retrying soon...")
-            time.sleep(3 + random.uniform(0, 2))
-            raise
-        raise RuntimeError(f"Upload failed for {call_id}: {e}")
+        # Retries / stale bucket listings: skip the transfer if we already hold this exact source
+        if _source_unchanged_and_uploaded(session, call_id, url):
+            logger.info(f"[UNCHANGED] {call_id} already uploaded from the same source")
+            return False
+
+        # Stream the download straight into the upload: chunks flow through
+        # without buffering the whole MP3, and both legs overlap
+        with session.get(url, stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+
+            # Upload to the Storage REST endpoint (x-upsert overwrites if forced)
+            upload_resp = session.post(
+                f"{STORAGE_OBJECT_URL}/{filename}",
+                data=resp.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                headers=_UPLOAD_HEADERS,
+                timeout=60,
+            )
+            upload_resp.raise_for_status()
+
+            etag = resp.headers.get("ETag")
+            if etag:
+                _remember_etag(call_id, etag)
+
+        logger.success(f"Uploaded {call_id}")
+        return True
 
     except Exception as e:
-        raise RuntimeError(f"Upload failed for {call_id}: {e}")
+        raise RuntimeError(f"Upload failed for {call_id}: {e}") from e
 
 
 # ============================================================================
@@ -154,70 +497,136 @@ def upload_recordings_parallel(df: pd.DataFrame, max_workers: int = MAX_WORKERS)
     - Success breakdown: uploaded, signed_url_generated (already in bucket)
     - Failed breakdown: skipped_no_stereo_url, failed
     """
-    failed_records = []
-    skipped_no_url_records = []
-
-    def upload_task(row: pd.Series) -> tuple[str, Optional[str], Optional[str], str]:
-        call_id = row["id"]
-        stereo_url = row.get("stereo_recording_url")
-
-        # --- Skip if missing URL
-        if not stereo_url:
-            logger.debug(f"[SKIP] No stereo URL for {call_id}")
-            skipped_no_url_records.append({"id": call_id})
-            return call_id, None, None, "skipped_no_stereo_url"
-
-        # --- Check if already in bucket
-        if _file_exists_in_bucket(call_id):
-            logger.debug(f"[EXISTS] Generating signed URL for {call_id}")
-            signed_url, expiry_time = _generate_signed_url(call_id)
-            if signed_url:
-                return call_id, signed_url, expiry_time, "signed_url_generated"
-            else:
-                logger.error(f"[FAILED] Could not generate signed URL for {call_id}")
-                failed_records.append({"id": call_id, "stereo_recording_url": stereo_url})
-                return call_id, None, None, "failed"
-
-        # --- Upload new file with retry
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                signed_url, expiry_time = _upload_recording(call_id, stereo_url)
-                return call_id, signed_url, expiry_time, "uploaded"
-            except Exception as e:
-                if attempt < MAX_RETRIES:
-                    wait_time = BACKOFF_BASE * attempt + random.uniform(0, 2)
+    existing_files = _get_existing_files()
+    failed_log = FailedUploadLog()
+
+    # --- Partition up front (vectorized) so only missing files reach the download+upload pool ---
+    # reindex keeps a missing URL column as NA; Arrow-backed columns yield pd.NA for missing URLs
+    tasks = df.reindex(columns=["id", "stereo_recording_url"])
+    urls = tasks["stereo_recording_url"]
+    has_url = (urls.notna() & (urls != "")).fillna(False).astype(bool)
+    in_bucket = (tasks["id"].astype(str) + ".mp3").isin(existing_files)
+
+    # Fresh URL from an earlier run: only trusted when the listing confirms the object is there
+    cached = _valid_cached_urls(tasks["id"][has_url & in_bucket])
+
+    # (call_id, stereo_url, status, error) per row; workers only return these, shared state stays here
+    task_results: list[tuple[str, Optional[str], UploadStatus, Optional[str]]] = [
+        (call_id, None, UploadStatus.SKIPPED_NO_STEREO_URL, None) for call_id in tasks["id"][~has_url]
+    ]
+    # Already in bucket: no download, just signed (or served from cache) below
+    existing = tasks[has_url & in_bucket]
+    task_results.extend(
+        (call_id, url, UploadStatus.SIGNED_URL_GENERATED, None)
+        for call_id, url in zip(existing["id"], existing["stereo_recording_url"])
+    )
+    to_upload = tasks[has_url & ~in_bucket]
+
+    # --- Parallel Execution ---
+    logger.info(
+        f"Processing {len(df)} recordings: {len(to_upload)} to upload, "
+        f"{len(existing)} already in bucket, {int((~has_url).sum())} without stereo URL..."
+    )
+    # Bounded submission: at most max_workers * 2 attempts queued or running at once.
+    # Failed attempts are rescheduled for ready_at instead of sleeping in a worker thread,
+    # so backoff never takes a slot away from healthy uploads.
+    max_inflight = max_workers * 2
+    inflight: Dict[concurrent.futures.Future, tuple[str, str, int, float]] = {}
+    retries: list[tuple[float, int, str, str, int, float]] = []  # heap of (ready_at, seq, id, url, attempt, wait)
+    retry_seq = itertools.count()
+    # Plain (id, url) tuples pulled lazily: no Series or namedtuple built per row
+    fresh = to_upload.itertuples(index=False, name=None)
+    fresh_exhausted = False
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            tqdm(total=len(to_upload), desc="Uploading recordings", ncols=100) as progress:
+        while True:
+            # --- Fill free slots: due retries first, then new rows
+            while len(inflight) < max_inflight:
+                if retries and retries[0][0] <= time.monotonic():
+                    _, _, call_id, stereo_url, attempt, wait_time = heapq.heappop(retries)
+                elif not fresh_exhausted:
+                    next_row = next(fresh, None)
+                    if next_row is None:
+                        fresh_exhausted = True
+                        continue
+                    call_id, stereo_url = next_row
+                    attempt, wait_time = 1, BACKOFF_BASE
+                else:
+                    break
+                future = executor.submit(_upload_recording, call_id, stereo_url)
+                inflight[future] = (call_id, stereo_url, attempt, wait_time)
+
+            if not inflight and not retries:
+                break
+
+            # --- Wait for a finished attempt or the next retry coming due
+            timeout = max(0.0, retries[0][0] - time.monotonic()) if retries else None
+            if not inflight:
+                time.sleep(timeout)
+                continue
+            done, _ = concurrent.futures.wait(
+                inflight, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+
+            for future in done:
+                call_id, stereo_url, attempt, wait_time = inflight.pop(future)
+                e = future.exception()
+                if e is None:
+                    existing_files.add(f"{call_id}.mp3")
+                    status = UploadStatus.UPLOADED if future.result() else UploadStatus.SIGNED_URL_GENERATED
+                    task_results.append((call_id, stereo_url, status, None))
+                    progress.update(1)
+                elif attempt < MAX_RETRIES:
+                    # Decorrelated jitter; a server Retry-After wins
+                    wait_time = _next_backoff(wait_time)
+                    retry_after = _retry_after_seconds(e)
+                    if retry_after is not None:
+                        wait_time = min(MAX_BACKOFF, retry_after)
                     logger.warning(
                         f"[RETRY] {call_id} — attempt {attempt}/{MAX_RETRIES}, retrying in {wait_time:.1f}s..."
                     )
-                    time.sleep(wait_time)
+                    heapq.heappush(retries, (
+                        time.monotonic() + wait_time, next(retry_seq), call_id, stereo_url, attempt + 1, wait_time
+                    ))
                 else:
                     logger.error(f"[FAILED] {call_id}: all retries exhausted — {e}")
-                    failed_records.append({"id": call_id, "stereo_recording_url": stereo_url})
-                    return call_id, None, None, "failed"
+                    failed_log.write(call_id, stereo_url, str(e))
+                    task_results.append((call_id, stereo_url, UploadStatus.FAILED, str(e)))
+                    progress.update(1)
 
-    # --- Parallel Execution ---
-    logger.info(f"Processing {len(df)} recordings...")
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        results = list(
-            tqdm(
-                executor.map(upload_task, [row for _, row in df.iterrows()]),
-                total=len(df),
-                desc="Processing recordings",
-                ncols=100,
-            )
-        )
+    # --- Sign everything now in the bucket that the cache doesn't cover ---
+    newly_signed = _generate_signed_urls_bulk(
+        [cid for cid, _, s, _ in task_results if s in _SIGNED_STATUSES and cid not in cached]
+    )
+    _update_signed_url_cache(newly_signed)
+    signed = {**cached, **newly_signed}
+
+    results = []
+    for call_id, stereo_url, status, error in task_results:
+        signed_url, expiry_time = signed.get(call_id, (None, None))
+        if status in _SIGNED_STATUSES and not signed_url:
+            logger.error(f"[FAILED] Could not generate signed URL for {call_id}")
+            if status == UploadStatus.SIGNED_URL_GENERATED:
+                status, error = UploadStatus.FAILED, "signed URL generation failed"
+                failed_log.write(call_id, stereo_url, error)
+        results.append((call_id, stereo_url, signed_url, expiry_time, status, error))
 
     # --- Compile Results ---
     upload_map = {
         call_id: {"signed_url": url, "signed_url_expiry": expiry}
-        for call_id, url, expiry, _ in results
+        for call_id, _, url, expiry, _, _ in results
     }
 
-    # Count breakdown
-    uploaded_count = sum(1 for _, _, _, s in results if s == "uploaded")
-    signed_url_generated_count = sum(1 for _, _, _, s in results if s == "signed_url_generated")
-    skipped_no_url_count = sum(1 for _, _, _, s in results if s == "skipped_no_stereo_url")
-    failed_count = sum(1 for _, _, _, s in results if s == "failed")
+    # Count breakdown (one bincount over the small-int statuses)
+    counts = np.bincount(
+        np.fromiter((status for _, _, _, _, status, _ in results), dtype=np.intp, count=len(results)),
+        minlength=len(UploadStatus),
+    )
+    uploaded_count = int(counts[UploadStatus.UPLOADED])
+    signed_url_generated_count = int(counts[UploadStatus.SIGNED_URL_GENERATED])
+    skipped_no_url_count = int(counts[UploadStatus.SKIPPED_NO_STEREO_URL])
+    failed_count = int(counts[UploadStatus.FAILED])
 
     total_success = uploaded_count + signed_url_generated_count
     total_processed = len(df)
@@ -233,10 +642,10 @@ def upload_recordings_parallel(df: pd.DataFrame, max_workers: int = MAX_WORKERS)
             f"⚠️  Skipped (no URL)={skipped_no_url_count}, Failed={failed_count}"
         )
 
-    # --- Save failed uploads if any ---
-    if failed_records:
-        pd.DataFrame(failed_records).to_csv(FAILED_UPLOADS_CSV, index=False)
-        logger.warning(f"⚠️  Saved {len(failed_records)} failed uploads to {FAILED_UPLOADS_CSV}")
+    # --- Failed uploads were streamed to CSV as they happened ---
+    failed_log.close()
+    if failed_log.count:
+        logger.warning(f"⚠️  Saved {failed_log.count} failed uploads to {FAILED_UPLOADS_CSV}")
 
     return {
         "summary": {
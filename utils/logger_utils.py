@@ -1,6 +1,9 @@
 # utils/logger_utils.py
+import atexit
+import functools
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from rich.logging import RichHandler
 from config import LOG_FILE
 import os
@@ -10,14 +13,83 @@ import datetime
 # CUSTOM LOG LEVEL
 # ───────────────────────────────────────────────
 SUCCESS_LEVEL_NUM = 25  # Between INFO (20) and WARNING (30)
-logging.addLevelName(SUCCESS_LEVEL_NUM, "SUCCESS")
+_success_level_installed = False
 
 def success(self, message, *args, **kwargs):
     """Custom success log method."""
     if self.isEnabledFor(SUCCESS_LEVEL_NUM):
         self._log(SUCCESS_LEVEL_NUM, message, args, **kwargs)
 
-logging.Logger.success = success
+
+def _install_success_level() -> None:
+    """Register the SUCCESS level and Logger.success once per process."""
+    global _success_level_installed
+    if _success_level_installed:
+        return
+    logging.addLevelName(SUCCESS_LEVEL_NUM, "SUCCESS")
+    if not hasattr(logging.Logger, "success"):
+        logging.Logger.success = success
+    _success_level_installed = True
+
+
+_install_success_level()
+
+
+# ───────────────────────────────────────────────
+# SHARED HANDLERS (RUN ON A QUEUE LISTENER THREAD)
+# ───────────────────────────────────────────────
+@functools.lru_cache(maxsize=None)
+def _get_log_queue(use_rich: bool = True) -> queue.SimpleQueue:
+    """
+    Build the file + console handlers once per console style and start a
+    QueueListener that runs them on its own thread. Loggers only enqueue records,
+    so formatting, ANSI rendering and file I/O stay off the worker threads.
+    """
+    # ─────────────── FILE HANDLER (ROTATING, NO DELETION) ───────────────
+    log_dir = os.path.dirname(LOG_FILE) or "."
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    # Rotate daily, but keep ALL old logs (no deletion)
+    file_handler = TimedRotatingFileHandler(
+        LOG_FILE,
+        when="midnight",        # rotate daily at midnight
+        interval=1,
+        backupCount=0,          # 0 = keep all old logs
+        encoding="utf-8",
+        delay=False,
+        utc=True
+    )
+
+    file_formatter = logging.Formatter(
+        "%(asctime)s [%(levelname)s] %(name)s — %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+    file_handler.setFormatter(file_formatter)
+
+    # ─────────────── CONSOLE HANDLER (RICH) ───────────────
+    if use_rich:
+        console_handler = RichHandler(
+            rich_tracebacks=True,
+            markup=True,
+            show_time=False,
+            show_path=False,
+            log_time_format="%Y-%m-%d %H:%M:%S",
+            keywords=["SUCCESS"]
+        )
+        console_formatter = logging.Formatter("%(message)s")
+        console_handler.setFormatter(console_formatter)
+    else:
+        # fallback simple stream handler
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(file_formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    # Flush everything still queued before the interpreter exits
+    atexit.register(listener.stop)
+    return log_queue
 
 
 # ───────────────────────────────────────────────
@@ -26,54 +98,22 @@ logging.Logger.success = success
 def get_logger(name: str = None, use_rich: bool = True) -> logging.Logger:
     """
     Create a colorized, rotating, multi-handler logger.
-    Logs go both to console (Rich) and to file (rotating).
+    Logs go both to console (Rich) and to file (rotating) via a background QueueListener.
     """
-    logger = logging.getLogger(name or __name__)
+    return _build_logger(name or __name__, use_rich)
 
-    if not logger.handlers:
-        logger.setLevel(logging.DEBUG)
 
-        # ─────────────── FILE HANDLER (ROTATING, NO DELETION) ───────────────
-        log_dir = os.path.dirname(LOG_FILE) or "."
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-
-        # Rotate daily, but keep ALL old logs (no deletion)
-        file_handler = TimedRotatingFileHandler(
-            LOG_FILE,
-            when="midnight",        # rotate daily at midnight
-            interval=1,
-            backupCount=0,          # 0 = keep all old logs
-            encoding="utf-8",
-            delay=False,
-            utc=True
-        )
+@functools.lru_cache(maxsize=None)
+def _build_logger(name: str, use_rich: bool) -> logging.Logger:
+    """
+    Build the logger for (name, use_rich) once; repeat imports get the cached object,
+    so handlers are only ever attached once.
+    """
+    logger = logging.getLogger(name)
 
-        file_formatter = logging.Formatter(
-            "%(asctime)s [%(levelname)s] %(name)s — %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-
-        # ─────────────── CONSOLE HANDLER (RICH) ───────────────
-        if use_rich:
-            console_handler = RichHandler(
-                rich_tracebacks=True,
-                markup=True,
-                show_time=False,
-                show_path=False,
-                log_time_format="%Y-%m-%d %H:%M:%S",
-                keywords=["SUCCESS"]
-            )
-            console_formatter = logging.Formatter("%(message)s")
-            console_handler.setFormatter(console_formatter)
-            logger.addHandler(console_handler)
-        else:
-            # fallback simple stream handler
-            stream_handler = logging.StreamHandler()
-            stream_handler.setFormatter(file_formatter)
-            logger.addHandler(stream_handler)
+    if not logger.handlers:
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(QueueHandler(_get_log_queue(use_rich)))
 
         # ─────────────── STARTUP BANNER ───────────────
         logger.info("Logger initialized with rotating file + rich console output")
@@ -0,0 +1,35 @@
+# utils/rate_limiter.py
+import threading
+import time
+from typing import Optional
+
+
+# ───────────────────────────────────────────────
+# TOKEN BUCKET
+# ───────────────────────────────────────────────
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    Refills at `rate` tokens per second up to `capacity`; `acquire()` blocks
+    only when the bucket is empty, so bursts under the limit run at full speed.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
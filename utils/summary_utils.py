@@ -4,6 +4,8 @@ from config import USE_RICH_LOGGING
 
 logger = get_logger(__name__, use_rich=USE_RICH_LOGGING)
 
+SEPARATOR = "═" * 70
+
 def print_etl_summary(
     extract_count=0,
     transform_count=0,
@@ -22,25 +24,22 @@ def print_etl_summary(
     Prints a clean, color-coded summary banner for the ETL pipeline run.
     """
 
-    separator = "═" * 70
-    logger.info(f"\n{separator}")
-    logger.info("📊 ETL PIPELINE SUMMARY")
-    logger.info(separator)
-
-    logger.success(f"🟢 Extracted   : {extract_count:,} records")
-    logger.success(
+    lines = [
+        "",
+        SEPARATOR,
+        "📊 ETL PIPELINE SUMMARY",
+        SEPARATOR,
+        f"🟢 Extracted   : {extract_count:,} records",
         f"🧩 Transformed : {transform_count:,} records | "
-        f"🔎 Existing in DB: {num_existing:,}"
-    )
-    logger.success(
+        f"🔎 Existing in DB: {num_existing:,}",
         f"☁️  Recordings  : Total={upload_total:,} | "
         f"Success={upload_success:,} (Uploaded={upload_uploaded:,}, Signed URL Generated={upload_signed_url_generated:,}) | "
-        f"Skipped (no URL)={upload_skipped_no_url:,}, Failed={upload_failed:,}"
-    )
-    logger.success(f"💾 Loaded in DB : {load_success:,} succeeded, {load_failed:,} failed")
-
+        f"Skipped (no URL)={upload_skipped_no_url:,}, Failed={upload_failed:,}",
+        f"💾 Loaded in DB : {load_success:,} succeeded, {load_failed:,} failed",
+    ]
     if audit_time:
-        logger.info(f"🕒 Audit Time  : {audit_time}")
+        lines.append(f"🕒 Audit Time  : {audit_time}")
+    lines += [SEPARATOR, "✅ ETL run completed successfully!\n"]
 
-    logger.info(separator)
-    logger.success("✅ ETL run completed successfully!\n")
+    # One record (one handler pass / Rich render) for the whole banner
+    logger.success("\n".join(lines))